@@ -13,14 +13,18 @@ FEATURES:
 3. Future-Proof: Includes safety ranges for Box Drawing, Block Elements, and Greek.
 4. Tracking: Saves the used character list to scripts/unifont-chars.txt for git history.
 5. Verification: Use --verify to check if current game data requires regeneration (CI ready).
+6. Incremental: Skips generation when _test/all.json, this script and both outputs are unchanged
+   since the last run.
 
 USAGE:
   python3 scripts/gen-unifont.py          # Regenerate subset and tracking file
   python3 scripts/gen-unifont.py --verify # Check if subset covers current data
+  python3 scripts/gen-unifont.py --force  # Regenerate even if inputs are unchanged
 
 DEPENDENCIES:
   - fonttools (Python package) -> pip install fonttools
   - brotli (Python package, needed for WOFF2) -> pip install brotli
+  - orjson (optional, faster parsing of _test/all.json) -> pip install orjson
 
 NOTES:
 - This script attempts HTTPS download using the system CA bundle or certifi if installed.
@@ -32,15 +36,28 @@ NOTES:
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import shutil
 import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from urllib.request import urlopen, Request
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 # --- Configuration ---
 SOURCE_URL = "https://unpkg.com/@fontsource/unifont@5.2.5/files/unifont-latin-400-normal.woff2"
+# Read buffer for the download (shutil.COPY_BUFSIZE is 64 KiB on POSIX; on Windows it is
+# already 1 MiB, so this only changes POSIX behaviour)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Magic bytes at the start of every WOFF2 file
+WOFF2_SIGNATURE = b"wOF2"
 
 # Resolve repository root (parent of this script's directory)
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -50,11 +67,16 @@ INPUT_FONT = CACHE_DIR / "unifont-latin-400-normal.woff2"
 OUTPUT_FONT = REPO_ROOT / "src" / "assets" / "unifont-subset.woff2"
 CHARS_FILE = REPO_ROOT / "scripts" / "unifont-chars.txt"
 DATA_FILE = REPO_ROOT / "_test" / "all.json"
+# Digests of the inputs and outputs of the last successful generation
+STAMP_FILE = CACHE_DIR / "unifont.stamp"
 
 # Safety ranges (Box Drawing, Block Elements, Misc Symbols, Dingbats, etc., and Greek)
 # Matches the shell script: --unicodes="U+2500-26FF,U+0370-03FF"
 UNICODE_RANGES = "U+2500-26FF,U+0370-03FF"
 
+# Printable ASCII (space 32 to tilde 126)
+_ASCII_BASE = bytes(range(32, 127)).decode("ascii")
+
 
 def rel(path: Path) -> str:
     """Return a REPO_ROOT-relative string for display."""
@@ -64,6 +86,36 @@ def rel(path: Path) -> str:
         return str(path)
 
 
+@lru_cache(maxsize=None)
+def _certifi_cafile() -> Optional[str]:
+    """Return certifi's CA bundle path if certifi is installed (looked up once)."""
+    try:
+        import certifi  # type: ignore
+        return certifi.where()
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _ft_subset() -> Any:
+    """Import fontTools.subset once; exit with install instructions if it is missing."""
+    try:
+        from fontTools import subset as ft_subset  # type: ignore
+    except Exception:
+        print("Error: 'fonttools' is required. Install with: pip install fonttools brotli")
+        sys.exit(1)
+    return ft_subset
+
+
+@lru_cache(maxsize=None)
+def _range_codepoints() -> Tuple[int, ...]:
+    """Parse UNICODE_RANGES into code points (computed once)."""
+    try:
+        return tuple(_ft_subset().parse_unicodes(UNICODE_RANGES))
+    except Exception:
+        return ()
+
+
 def ensure_source_font() -> None:
     """
     Ensure the source Unifont WOFF2 exists in cache; download if missing.
@@ -75,42 +127,67 @@ def ensure_source_font() -> None:
     print(f"Source font missing in {rel(INPUT_FONT)}. Downloading from unpkg...")
 
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Download next to the target and rename once complete, so an interrupted run
+    # cannot leave a corrupt file that passes the is_file() check above
+    tmp_font = INPUT_FONT.with_name(INPUT_FONT.name + ".part")
     try:
         import ssl  # type: ignore
-        try:
-            import certifi  # type: ignore
-            cafile = certifi.where()
-        except Exception:
-            cafile = None
+        cafile = _certifi_cafile()
 
         req = Request(SOURCE_URL, headers={"User-Agent": "gen-unifont.py"})
         context = ssl.create_default_context(cafile=cafile) if cafile else ssl.create_default_context()
-        with urlopen(req, context=context) as resp, open(INPUT_FONT, "wb") as out:
-            shutil.copyfileobj(resp, out)
+        with urlopen(req, context=context) as resp, open(tmp_font, "wb") as out:
+            expected_size = resp.headers.get("Content-Length")
+            shutil.copyfileobj(resp, out, DOWNLOAD_CHUNK_SIZE)
+
+        # Never leave a truncated or non-font file behind as the cached source
+        size = tmp_font.stat().st_size
+        if expected_size is not None and int(expected_size) != size:
+            raise OSError(f"incomplete download ({size} of {expected_size} bytes)")
+        with open(tmp_font, "rb") as f:
+            if f.read(4) != WOFF2_SIGNATURE:
+                raise ValueError("downloaded file is not a WOFF2 font")
+        os.replace(tmp_font, INPUT_FONT)
     except Exception as e:
+        tmp_font.unlink(missing_ok=True)
         print("Failed to download source font:", e)
         sys.exit(1)
 
 
 def ascii_base_chars() -> str:
     """Return base set of printable ASCII (space 32 to tilde 126)."""
-    return "".join(chr(c) for c in range(32, 127))
+    return _ASCII_BASE
 
 
 def iter_objects(value: Any) -> Iterable[Dict[str, Any]]:
-    """Recursively yield all dict objects within the provided JSON value."""
-    if isinstance(value, dict):
-        yield value
-        for v in value.values():
-            yield from iter_objects(v)
-    elif isinstance(value, list):
-        for item in value:
-            yield from iter_objects(item)
+    """Yield all dict objects within the provided JSON value (iterative, order not preserved)."""
+    # Exact type checks are enough here: json and orjson only produce plain dict/list
+    stack = [value]
+    while stack:
+        v = stack.pop()
+        t = type(v)
+        if t is dict:
+            yield v
+            stack.extend(v.values())
+        elif t is list:
+            stack.extend(v)
 
 
 def load_json(path: Path) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Parse a JSON file, using orjson when available."""
+    return parse_json(path.read_bytes())
+
+
+def parse_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects input the stdlib accepts (NaN, lone surrogates);
+            # retry so installing it never changes the result
+            pass
+    return json.loads(data)
 
 
 def extract_data_chars(data_root: Any) -> Set[str]:
@@ -132,45 +209,65 @@ def extract_data_chars(data_root: Any) -> Set[str]:
     if not isinstance(data_items, list):
         return chars
 
-    # 1) ASCII art pictures
     for item in data_items:
-        if isinstance(item, dict) and item.get("type") == "ascii_art":
+        # 1) ASCII art pictures
+        if type(item) is dict and item.get("type") == "ascii_art":
             pic = item.get("picture")
-            if isinstance(pic, list):
-                for row in pic:
-                    if isinstance(row, str):
-                        chars.update(row)
+            if type(pic) is list:
+                chars.update("".join(row for row in pic if type(row) is str))
 
-    # 2) Symbols anywhere: keys "sym" or "symbol"
-    for item in data_items:
+        # 2) Symbols anywhere: keys "sym" or "symbol"
         for obj in iter_objects(item):
             for k in ("sym", "symbol"):
                 v = obj.get(k)
-                if isinstance(v, str):
+                if type(v) is str:
                     chars.update(v)
 
     return chars
 
 
-def get_data_chars() -> str:
+def get_data_chars(data_bytes: Optional[bytes] = None) -> str:
     """
     Compute the current character set needed for the game data.
+    - data_bytes, if given, is the already-read content of DATA_FILE.
     - If DATA_FILE is missing, return base ASCII set only (and warn).
     - Otherwise parse and combine sets, deduplicate and sort by codepoint.
     """
-    if not DATA_FILE.is_file():
+    if data_bytes is None and not DATA_FILE.is_file():
         print(f"Warning: {rel(DATA_FILE)} not found.")
         chars = set(ascii_base_chars())
     else:
         try:
-            data = load_json(DATA_FILE)
+            data = parse_json(data_bytes) if data_bytes is not None else load_json(DATA_FILE)
         except Exception as e:
             print(f"Warning: failed to read {rel(DATA_FILE)}: {e}")
             data = {}
         chars = extract_data_chars(data)
 
-    # Deduplicate and sort by code point
-    return "".join(sorted(chars, key=ord))
+    # Deduplicate and sort by code point (single-char strings already compare that way)
+    return "".join(sorted(chars))
+
+
+def digest(*chunks: bytes) -> str:
+    """Return a short BLAKE2b hex digest of the given byte strings."""
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def build_stamp(inputs: str) -> Optional[bytes]:
+    """
+    Return the stamp for the given inputs digest (game data and this script) plus
+    digests of the generated CHARS_FILE and OUTPUT_FONT, or None if either is missing.
+
+    Both outputs are tracked in git, so they can change under an unchanged input
+    (branch switch, checkout, hand edit); the skip requires them to match too.
+    """
+    if not (CHARS_FILE.is_file() and OUTPUT_FONT.is_file()):
+        return None
+    lines = [inputs, digest(CHARS_FILE.read_bytes()), digest(OUTPUT_FONT.read_bytes())]
+    return "\n".join(lines).encode("ascii")
 
 
 def human_size(num_bytes: int) -> str:
@@ -192,22 +289,20 @@ def run_pyftsubset(input_font: Path, chars_text: str, output_font: Path) -> None
     # Ensure output directory exists
     output_font.parent.mkdir(parents=True, exist_ok=True)
 
-    try:
-        from fontTools import subset as ft_subset  # type: ignore
-    except Exception:
-        print("Error: 'fonttools' is required. Install with: pip install fonttools brotli")
-        sys.exit(1)
-
-    # Parse safety ranges into code points
-    try:
-        range_codepoints = ft_subset.parse_unicodes(UNICODE_RANGES)
-    except Exception:
-        range_codepoints = []
+    ft_subset = _ft_subset()
+    range_codepoints = _range_codepoints()
 
     try:
         options = ft_subset.Options()
         options.flavor = "woff2"
         options.verbose = True
+        # Glyphs are rendered on a fixed grid: no hinting, kerning or OpenType layout needed.
+        # Tables are listed explicitly since fontTools' default drop list varies by version.
+        options.hinting = False
+        options.drop_tables += [
+            "GSUB", "GPOS", "GDEF", "BASE", "JSTF", "MATH",
+            "DSIG", "hdmx", "VDMX", "LTSH", "PCLT", "kern",
+        ]
 
         # Load font
         font = ft_subset.load_font(str(input_font), options)
@@ -236,11 +331,12 @@ def verify_mode() -> int:
         return 1
 
     print(f"2/2: Comparing against {rel(CHARS_FILE)}...")
-    tracked_chars = CHARS_FILE.read_text(encoding="utf-8")
+    tracked_chars = CHARS_FILE.read_bytes().decode("utf-8")
 
-    missing = sorted(set(current_data_chars) - set(tracked_chars), key=ord)
-    if missing:
-        missing_str = "".join(missing)
+    # current_data_chars is already deduplicated and sorted by code point
+    tracked = set(tracked_chars)
+    missing_str = "".join(c for c in current_data_chars if c not in tracked)
+    if missing_str:
         print("Error: New characters found in game data! They are not covered by the current subset.")
         print(f"Missing characters: {missing_str}")
         print("Please run 'pnpm gen:unifont' to update the font subset.")
@@ -250,25 +346,41 @@ def verify_mode() -> int:
         return 0
 
 
-def generate_mode() -> int:
+def generate_mode(force: bool = False) -> int:
     """Generate the subsetted font and update the tracked character file."""
     print("Starting font subset generation...")
 
+    # Read the game data once; it is used both for the stamp and for extraction
+    try:
+        data_bytes: Optional[bytes] = DATA_FILE.read_bytes()
+    except OSError:
+        data_bytes = None
+    inputs = digest(data_bytes, Path(__file__).read_bytes()) if data_bytes is not None else None
+
+    if not force and inputs is not None and STAMP_FILE.is_file():
+        if STAMP_FILE.read_bytes() == build_stamp(inputs):
+            print("Up to date: inputs and outputs unchanged since last generation (use --force to regenerate).")
+            return 0
+
     print(f"1/3: Extracting unique characters from {rel(DATA_FILE)}...")
-    current_data_chars = get_data_chars()
+    current_data_chars = get_data_chars(data_bytes)
 
     print("2/3: Managing source assets...")
     ensure_source_font()
 
     # Save tracked characters (no trailing newline to match shell behavior)
     CHARS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(CHARS_FILE, "w", encoding="utf-8", newline="") as f:
-        f.write(current_data_chars)
+    CHARS_FILE.write_bytes(current_data_chars.encode("utf-8"))
     print(f"Updated {rel(CHARS_FILE)}")
 
     print("3/3: Subsetting font (this may take a minute)...")
     run_pyftsubset(INPUT_FONT, current_data_chars, OUTPUT_FONT)
 
+    stamp = build_stamp(inputs) if inputs is not None else None
+    if stamp is not None:
+        STAMP_FILE.parent.mkdir(parents=True, exist_ok=True)
+        STAMP_FILE.write_bytes(stamp)
+
     print(f"Done! Subsetted font created at {rel(OUTPUT_FONT)}")
     try:
         size = OUTPUT_FONT.stat().st_size
@@ -282,17 +394,23 @@ def generate_mode() -> int:
 def main(argv: List[str]) -> int:
     """Entry point for CLI usage."""
     parser = argparse.ArgumentParser(description="Generate or verify a subset of Unifont used by the app.")
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
         "--verify",
         action="store_true",
         help="Verify if current game data requires regeneration of the font subset.",
     )
+    mode.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate the font subset even if the inputs are unchanged.",
+    )
     args = parser.parse_args(argv)
 
     if args.verify:
         return verify_mode()
     else:
-        return generate_mode()
+        return generate_mode(force=args.force)
 
 
 if __name__ == "__main__":